@@ -42,7 +42,6 @@ __all__ = [
 
 
 import atexit
-import copy
 import os
 import tempfile
 
@@ -278,10 +277,10 @@ def cli_del(delcmds, ignore_seq_usage):
     if not ignore_seq_usage:
         error = False
         seq_dicts = []
-        for seq in sequence_names:
-            try:
-                seq_dict = sequence_impl_core.read_dict(seq)
-            except FileNotFoundError:
+        for seq, seq_dict in zip(
+            sequence_names, sequence_impl_core.read_dicts(sequence_names)
+        ):
+            if seq_dict is None:
                 continue
             seq_dict["name"] = seq
             seq_dicts.append(seq_dict)
@@ -339,7 +338,7 @@ def cli_run(cmd, quiet, args):
     # Also it's not too surprising that we would block editing or deleting a
     # cmd while it is running.
     locks.item_lock("cmd", cmd, locks.LockType.READ)
-    unused_args = copy.deepcopy(args)
+    unused_args = dict.fromkeys(args)
     rsv_ctx = command_impl_op.ReservedPlaceholdersCtx()
     with tempfile.TemporaryDirectory() as tmpdirname:
         rsv_ctx.tempdir = tmpdirname + os.sep
@@ -374,7 +373,7 @@ def cli_vals(cmd, args, print_after_set):
 
     """
     locks.item_lock("cmd", cmd, locks.LockType.WRITE)
-    unused_args = copy.deepcopy(args)
+    unused_args = dict.fromkeys(args)
     status = command_impl_op.vals(
         cmd, args, unused_args, print_after_set, False
     )
@@ -414,7 +413,7 @@ def cli_vals_all(placeholder_args):
     command_names = command_impl_core.all_names()
     locks.multi_item_lock("cmd", command_names, locks.LockType.WRITE)
     print()
-    unused_args = copy.deepcopy(placeholder_args)
+    unused_args = dict.fromkeys(placeholder_args)
     print(Fore.MAGENTA + "* updating all commands" + Fore.RESET)
     print()
     error = False
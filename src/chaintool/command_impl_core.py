@@ -23,37 +23,81 @@
 __all__ = [
     "CMD_DIR",
     "init",
+    "cmd_path",
     "exists",
     "all_names",
     "read_dict",
+    "read_dicts",
+    "invalidate_dict",
     "write_dict",
     "create_temp",
 ]
 
 
+import copy
 import os
+import sys
+import threading
+
+from collections import OrderedDict
 
 import yaml  # from pyyaml
 
+from . import shared
 from .shared import DATA_DIR
 
 
 CMD_DIR = os.path.join(DATA_DIR, "commands")
+CMD_DIR_PREFIX = CMD_DIR + os.sep
+
+# Parsed command dicts, keyed by file path. Each value is a 2-tuple of the
+# file's (st_mtime_ns, st_size) when it was parsed, and the parsed dict.
+# Kept in least-recently-used order and limited to DICT_CACHE_MAX entries.
+# DICT_CACHE_LOCK guards it, since read_dicts reads from multiple threads.
+DICT_CACHE = OrderedDict()
+DICT_CACHE_MAX = 256
+DICT_CACHE_LOCK = threading.Lock()
 
 
-def init(_prev_version, _cur_version):
+def init(prev_version, cur_version):
     """Initialize module.
 
     Called when chaintool runs. Creates the commands directory, inside the
     data appdir, if necessary.
 
-    :param _prev_version: version string of previous chaintool run; not used
-    :type _prev_version:  str
-    :param _cur_version:  version string of current chaintool run; not used
-    :type _cur_version:   str
+    If upgrading from before schema version 1, also update the stored
+    commands with :func:`.command_impl_op.upgrade_stored_commands`. That
+    module is only imported here when needed, since it imports this one.
+
+    :param prev_version: schema version of previous chaintool run
+    :type prev_version:  int
+    :param cur_version:  schema version of current chaintool run
+    :type cur_version:   int
 
     """
     os.makedirs(CMD_DIR, exist_ok=True)
+    if prev_version < 1 <= cur_version:
+        # pylint: disable=import-outside-toplevel,cyclic-import
+        from . import command_impl_op
+
+        command_impl_op.upgrade_stored_commands()
+
+
+def cmd_path(cmd):
+    """Get the path of the file for the given command.
+
+    This is a plain concatenation onto :const:`CMD_DIR` rather than an
+    :func:`os.path.join`; the result is the same except that a name that
+    looks like an absolute path still stays inside the commands directory.
+
+    :param cmd: name of command
+    :type cmd:  str
+
+    :returns: path of the command file in the commands directory
+    :rtype:   str
+
+    """
+    return CMD_DIR_PREFIX + cmd
 
 
 def exists(cmd):
@@ -68,26 +112,57 @@ def exists(cmd):
     :rtype:   bool
 
     """
-    return os.path.exists(os.path.join(CMD_DIR, cmd))
+    return os.path.exists(cmd_path(cmd))
 
 
 def all_names():
     """Get the names of all current commands.
 
-    Return the filenames in the commands directory.
+    Return the filenames in the commands directory. Uses :func:`os.scandir`
+    so that entries that aren't regular files (which shouldn't be there
+    anyway) can be skipped without an extra stat per entry.
 
     :returns: current command names
     :rtype:   list[str]
 
     """
-    return os.listdir(CMD_DIR)
+    with os.scandir(CMD_DIR) as entries:
+        return [entry.name for entry in entries if entry.is_file()]
+
+
+def intern_placeholder_keys(cmd_dict):
+    """Intern the placeholder names used as keys in a command dictionary.
+
+    The same placeholder names show up across many commands, and get
+    collected into shared dicts and sets when printing or dumping multiple
+    commands. Interning them lets those lookups succeed on an identity check
+    rather than a string comparison. The interned strings also survive the
+    deep copies handed out by :func:`read_dict`.
+
+    :param cmd_dict: dictionary of command properties/values; to modify
+    :type cmd_dict:  dict[str, str]
+
+    """
+    for field in ("args", "args_modifiers", "toggle_args"):
+        if field in cmd_dict:
+            cmd_dict[field] = {
+                sys.intern(key): value
+                for key, value in cmd_dict[field].items()
+            }
 
 
 def read_dict(cmd):
     """Fetch the contents of a command as a dictionary.
 
-    From the commands directory, load the YAML for the named command. Return
-    its properties as a dictionary.
+    From the commands directory, load the YAML for the named command (using
+    the libyaml-backed loader if available). Return its properties as a
+    dictionary.
+
+    Parsed dictionaries are cached for the life of the process (for up to
+    :const:`DICT_CACHE_MAX` recently used commands), keyed by file path and
+    checked against the file's modification time and size. A cache hit skips
+    the YAML parse. Callers always get their own deep copy,
+    since many of them modify the returned dictionary.
 
     :param cmd: name of command to read
     :type cmd:  str
@@ -98,16 +173,88 @@ def read_dict(cmd):
     :rtype:   dict[str, str]
 
     """
-    with open(os.path.join(CMD_DIR, cmd), "r") as cmd_file:
-        cmd_dict = yaml.safe_load(cmd_file)
-    return cmd_dict
+    path = cmd_path(cmd)
+    with open(path, "rb") as cmd_file:
+        stat = os.fstat(cmd_file.fileno())
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with DICT_CACHE_LOCK:
+            cached = DICT_CACHE.get(path)
+            if cached is not None and cached[0] == stamp:
+                DICT_CACHE.move_to_end(path)
+                cmd_dict = cached[1]
+            else:
+                cmd_dict = None
+        if cmd_dict is not None:
+            return copy.deepcopy(cmd_dict)
+        cmd_dict = yaml.load(cmd_file.read(), Loader=shared.YamlLoader)
+    intern_placeholder_keys(cmd_dict)
+    with DICT_CACHE_LOCK:
+        DICT_CACHE[path] = (stamp, cmd_dict)
+        DICT_CACHE.move_to_end(path)
+        if len(DICT_CACHE) > DICT_CACHE_MAX:
+            DICT_CACHE.popitem(last=False)
+    return copy.deepcopy(cmd_dict)
+
+
+def read_dict_if_exists(cmd):
+    """Fetch the contents of a command as a dictionary, if it exists.
+
+    Same as :func:`read_dict` except that a nonexistent command results in a
+    return value of ``None`` rather than an exception.
+
+    :param cmd: name of command to read
+    :type cmd:  str
+
+    :returns: dictionary of command properties/values, if command exists
+    :rtype:   dict[str, str] | None
+
+    """
+    try:
+        return read_dict(cmd)
+    except FileNotFoundError:
+        return None
+
+
+def read_dicts(cmds):
+    """Fetch the contents of multiple commands as dictionaries.
+
+    Batch wrapper around :func:`read_dict`; see :func:`.shared.read_dicts`.
+
+    :param cmds: names of commands to read
+    :type cmds:  list[str]
+
+    :returns: dictionaries of command properties/values, with ``None`` in
+              place of any command that does not exist
+    :rtype:   list[dict[str, str] | None]
+
+    """
+    return shared.read_dicts(cmds, read_dict)
+
+
+def invalidate_dict(cmd):
+    """Drop any cached parse of a command.
+
+    Called when the command file is written or deleted, so that a later
+    :func:`read_dict` can't return stale contents even if the file's
+    modification time and size happen to be unchanged.
+
+    :param cmd: name of command to forget
+    :type cmd:  str
+
+    """
+    with DICT_CACHE_LOCK:
+        DICT_CACHE.pop(cmd_path(cmd), None)
 
 
 def write_dict(cmd, cmd_dict, mode):
     """Write the contents of a command as a dictionary.
 
-    Dump the command dictionary into a YAML document and write it into the
-    commands directory.
+    Dump the command dictionary into a (UTF-8 encoded) YAML document and
+    write it into the commands directory.
+
+    The document is written via :func:`.shared.write_data_file`, so anything
+    reading the command file sees either the old contents or the new, never
+    a partial write.
 
     :param cmd:      name of command to write
     :type cmd:       str
@@ -119,9 +266,18 @@ def write_dict(cmd, cmd_dict, mode):
     :raises: FileExistsError if mode is "x" and the command exists
 
     """
-    cmd_doc = yaml.dump(cmd_dict, default_flow_style=False)
-    with open(os.path.join(CMD_DIR, cmd), mode) as cmd_file:
-        cmd_file.write(cmd_doc)
+    invalidate_dict(cmd)
+    shared.write_data_file(
+        cmd_path(cmd),
+        mode,
+        lambda outstream: yaml.dump(
+            cmd_dict,
+            outstream,
+            Dumper=shared.YamlDumper,
+            default_flow_style=False,
+            encoding="utf-8",
+        ),
+    )
 
 
 def create_temp(cmd):
@@ -137,7 +293,6 @@ def create_temp(cmd):
     """
     cmd_dict = {
         "cmdline": "",
-        "format": "",
         "args": dict(),
         "args_modifiers": dict(),
         "toggle_args": dict(),
@@ -34,9 +34,13 @@ __all__ = [
 ]
 
 
+import functools
 import os
 import re
+import signal
+import string
 import subprocess
+import sys
 
 from dataclasses import dataclass
 
@@ -46,7 +50,6 @@ from . import command_impl_core
 from . import command_impl_print
 from . import shared
 from . import virtual_tools
-from .command_impl_core import CMD_DIR
 
 
 @dataclass
@@ -58,25 +61,110 @@ class ReservedPlaceholdersCtx:
     tempdir: str = None
 
 
-PLACEHOLDER_RE = re.compile(r"^((?:[^/+=]+/)*)([^+][^=]*)(?:=(.*))?$")
-PLACEHOLDER_TOGGLE_RE = re.compile(r"^(\+[^=]+)=([^:]*):(.*)$")
-ALPHANUM_RE = re.compile(r"^[a-zA-Z][a-zA-Z0-9_]*$")
+# Matches a toggle placeholder with values ("toggle", "untoggled", and
+# "toggled" groups), or failing that a non-toggle placeholder ("modifiers",
+# "name", and "value" groups; "value" is None if there's no "=").
+PLACEHOLDER_RE = re.compile(
+    r"^(?:"
+    r"(?P<toggle>\+[^=]+)=(?P<untoggled>[^:]*):(?P<toggled>.*)"
+    r"|"
+    r"(?P<modifiers>(?:[^/+=]+/)*)(?P<name>[^+][^=]*)(?:=(?P<value>.*))?"
+    r")$",
+    re.ASCII,
+)
+ALPHANUM_RE = re.compile(r"^[a-zA-Z][a-zA-Z0-9_]*$", re.ASCII)
+# Matches a doubled brace, or a placeholder token. A token starts with an
+# undoubled open-brace followed by a non-brace character. Before any "=",
+# the first close-brace ends the token; after the "=" we're in a value,
+# where doubled braces are literal characters. Group 1 is the token text and
+# group 2 is the close-brace (empty if the token is unterminated).
+CMDLINE_TOKEN_RE = re.compile(
+    r"\{\{|\}\}|\{(?=[^{}])([^}=]*(?:=(?:\{\{|\}\}|[^}])*)?)(\}|\Z)",
+    re.ASCII,
+)
 RESERVED_PLACEHOLDERS = ["prev_stdout", "tempdir"]
-
-
-def remove_if_present(element_to_remove, list_to_modify):
-    """Remove item from list if it is a member.
-
-    Utility function used in various spots in this module for an easy
-    one-line list-removal operation.
-
-    :param element_to_remove: element to remove from list
-    :param list_to_modify:    input list; to modify
-    :type list_to_modify:     list[Any]
+# A commandline consisting only of these characters has no quoting,
+# expansions, redirections, etc. for the shell to process.
+SHELL_FREE_RE = re.compile(r"[\w@%+=:,./ -]+\Z", re.ASCII)
+# Shell keywords and builtins. As the first word of a commandline, these
+# either mean something different than an executable of the same name, or
+# (e.g. echo, pwd) could behave slightly differently than that executable.
+SHELL_ONLY_WORDS = frozenset(
+    [
+        ".",
+        "alias",
+        "bg",
+        "break",
+        "case",
+        "cd",
+        "command",
+        "continue",
+        "do",
+        "done",
+        "echo",
+        "elif",
+        "else",
+        "esac",
+        "eval",
+        "exec",
+        "exit",
+        "export",
+        "fc",
+        "fg",
+        "fi",
+        "for",
+        "function",
+        "getopts",
+        "hash",
+        "if",
+        "in",
+        "jobs",
+        "kill",
+        "local",
+        "printf",
+        "pwd",
+        "read",
+        "readonly",
+        "return",
+        "select",
+        "set",
+        "shift",
+        "source",
+        "test",
+        "then",
+        "time",
+        "times",
+        "trap",
+        "type",
+        "ulimit",
+        "umask",
+        "unalias",
+        "unset",
+        "until",
+        "wait",
+        "while",
+    ]
+)
+
+
+def is_alphanum_name(name):
+    """Check whether the given string is valid as a placeholder name.
+
+    A valid name must match :const:`ALPHANUM_RE`. Any ASCII Python
+    identifier that doesn't begin with an underscore is such a match, and
+    that can be tested without running the regex; only fall back to the
+    regex for other cases.
+
+    :param name: name to check
+    :type name:  str
+
+    :returns: whether the name is valid
+    :rtype:   bool
 
     """
-    if element_to_remove in list_to_modify:
-        list_to_modify.remove(element_to_remove)
+    if name.isascii() and name.isidentifier() and name[0] != "_":
+        return True
+    return ALPHANUM_RE.match(name) is not None
 
 
 def explode_literal_braces(value):
@@ -90,6 +178,8 @@ def explode_literal_braces(value):
     :rtype:   str
 
     """
+    if "{" not in value and "}" not in value:
+        return value
     return value.replace("{", "{{").replace("}", "}}")
 
 
@@ -104,6 +194,8 @@ def collapse_literal_braces(value):
     :rtype:   str
 
     """
+    if "{" not in value and "}" not in value:
+        return value
     return value.replace("{{", "{").replace("}}", "}")
 
 
@@ -136,13 +228,15 @@ MODIFIERS_DISPATCH = {
     "basename": os.path.basename,
     "stem": stem_modifier,
 }
+MODIFIER_NAMES = frozenset(MODIFIERS_DISPATCH)
 
 
 def valid_modifiers(modifiers):
     """Check whether all of the given modifiers are valid.
 
     Return ``True`` if and only if every element of the input ``modifiers``
-    list is a key in the :const:`MODIFIERS_DISPATCH` constant dictionary.
+    list is a key in the :const:`MODIFIERS_DISPATCH` constant dictionary
+    (i.e. is in :const:`MODIFIER_NAMES`).
 
     :param modifiers: modifiers to check
     :type modifiers:  list[str]
@@ -151,10 +245,44 @@ def valid_modifiers(modifiers):
     :rtype:   bool
 
     """
-    for mod in modifiers:
-        if mod not in MODIFIERS_DISPATCH:
-            return False
-    return True
+    return MODIFIER_NAMES.issuperset(modifiers)
+
+
+@functools.lru_cache(maxsize=None)
+def modifier_chain(modifiers):
+    """Prepare to apply a list of modifiers.
+
+    Return the placeholder-name prefix for this list of modifiers, along with
+    a single function that applies all of the modifier functions in the
+    appropriate order (last-listed modifier first). Results are cached, since
+    the same few modifier lists are applied over and over.
+
+    :param modifiers: modifiers, as written in the placeholder
+    :type modifiers:  tuple[str, ...]
+
+    :returns: placeholder-name prefix, and function to apply the modifiers
+    :rtype:   tuple[str, Callable[[str], str]]
+
+    """
+    modifier_fun = MODIFIERS_DISPATCH[modifiers[-1]]
+    for mod in reversed(modifiers[:-1]):
+        modifier_fun = compose_modifiers(MODIFIERS_DISPATCH[mod], modifier_fun)
+    return "/".join(modifiers) + "/", modifier_fun
+
+
+def compose_modifiers(outer_fun, inner_fun):
+    """Make a function that applies one modifier function after another.
+
+    :param outer_fun: modifier function to apply second
+    :type outer_fun:  Callable[[str], str]
+    :param inner_fun: modifier function to apply first
+    :type inner_fun:  Callable[[str], str]
+
+    :returns: function applying ``inner_fun`` then ``outer_fun``
+    :rtype:   Callable[[str], str]
+
+    """
+    return lambda value: outer_fun(inner_fun(value))
 
 
 def populated_modified_values(values_for_names, modifiers_for_names):
@@ -189,14 +317,39 @@ def populated_modified_values(values_for_names, modifiers_for_names):
     :rtype:   bool
 
     """
+    if not modifiers_for_names:
+        return
     for name, modlist_list in modifiers_for_names.items():
         if name in values_for_names:
+            value = values_for_names[name]
             for modlist in modlist_list:
-                mod_value = values_for_names[name]
-                modifiers_prefix = "/".join(modlist) + "/"
-                for modifier in reversed(modlist):
-                    mod_value = MODIFIERS_DISPATCH[modifier](mod_value)
-                values_for_names[modifiers_prefix + name] = mod_value
+                modifiers_prefix, modifier_fun = modifier_chain(tuple(modlist))
+                values_for_names[modifiers_prefix + name] = modifier_fun(value)
+
+
+def split_nontoggle_arg(arg):
+    """Split a non-toggle placeholder arg into its parts.
+
+    Most args are a plain ``name=value`` (or bare ``name``), and for those
+    the parts can be found with simple string operations. Anything else
+    (modifiers, or newlines that the regex treats specially) falls back to
+    matching against :const:`PLACEHOLDER_RE`, giving the same results.
+
+    :param arg: placeholder argument, not starting with "+"
+    :type arg:  str
+
+    :returns: modifiers prefix, placeholder name, and value (``None`` if no
+              value), or ``None`` if the arg isn't a valid placeholder
+    :rtype:   tuple[str, str, str | None] | None
+
+    """
+    name, eq, value = arg.partition("=")
+    if name and "/" not in name and "\n" not in arg:
+        return "", name, value if eq else None
+    match = PLACEHOLDER_RE.match(arg)
+    if match is None or match.group("toggle") is not None:
+        return None
+    return match.group("modifiers", "name", "value")
 
 
 def update_runtime_values_from_args(
@@ -240,34 +393,36 @@ def update_runtime_values_from_args(
     :type all_args:                list[str]
     :param unused_args:            placeholder arguments unused by any
                                    command in current sequence; to modify
-    :type unused_args:             list[str]
+    :type unused_args:             dict[str, None]
 
     :returns: whether the modifications are all valid
     :rtype:   bool
 
     """
-    valid_non_toggles = list(values_for_names.keys())
-    unactivated_toggles = list(togglevalues_for_names.keys())
+    unactivated_toggles = dict.fromkeys(togglevalues_for_names)
+    placeholder_match = PLACEHOLDER_RE.match
     for arg in all_args:
-        toggle_match = PLACEHOLDER_TOGGLE_RE.match(arg)
-        if toggle_match:
+        if arg[:1] == "+":
+            # Bare toggle names are the common case here, and can be
+            # identified without running the regex.
+            if "=" not in arg:
+                if arg in togglevalues_for_names:
+                    values_for_names[arg] = togglevalues_for_names[arg][1]
+                    unactivated_toggles.pop(arg, None)
+                    unused_args.pop(arg, None)
+                continue
+            match = placeholder_match(arg)
+            if match is None:
+                continue
             shared.errprint(
                 "Can't specify values for 'toggle' style placeholders such as"
-                " '{}' in this operation.".format(toggle_match.group(1))
+                " '{}' in this operation.".format(match.group("toggle"))
             )
             return False
-        if arg[0] == "+":
-            if arg in togglevalues_for_names:
-                values_for_names[arg] = togglevalues_for_names[arg][1]
-                remove_if_present(arg, unactivated_toggles)
-                remove_if_present(arg, unused_args)
-            continue
-        nontoggle_match = PLACEHOLDER_RE.match(arg)
-        if nontoggle_match is None:
+        nontoggle_parts = split_nontoggle_arg(arg)
+        if nontoggle_parts is None:
             continue
-        modifiers_prefix = nontoggle_match.group(1)
-        key = nontoggle_match.group(2)
-        value = nontoggle_match.group(3)
+        modifiers_prefix, key, value = nontoggle_parts
         if key in RESERVED_PLACEHOLDERS:
             shared.errprint(
                 "Can't specify reserved placeholder '{}'.".format(key)
@@ -286,12 +441,12 @@ def update_runtime_values_from_args(
                 )
             )
             return False
-        if key in valid_non_toggles:
+        if key in values_for_names:
             values_for_names[key] = value
-            remove_if_present(arg, unused_args)
+            unused_args.pop(arg, None)
     for key in unactivated_toggles:
         values_for_names[key] = togglevalues_for_names[key][0]
-    unspecified = [k for k in valid_non_toggles if values_for_names[k] is None]
+    unspecified = [k for k, v in values_for_names.items() if v is None]
     if unspecified:
         shared.errprint(
             "Not all placeholders in the commandline have been given a value."
@@ -330,36 +485,35 @@ def update_default_values_from_args(
     :type all_args:                list[str]
     :param unused_args:            placeholder arguments unused by any
                                    command in current sequence; to modify
-    :type unused_args:             list[str]
+    :type unused_args:             dict[str, None]
 
     :returns: whether the modifications are all valid
     :rtype:   bool
 
     """
-    valid_non_toggles = list(values_for_names.keys())
+    placeholder_match = PLACEHOLDER_RE.match
     for arg in all_args:
-        toggle_match = PLACEHOLDER_TOGGLE_RE.match(arg)
-        if toggle_match:
-            key = toggle_match.group(1)
+        if arg[:1] == "+":
+            match = placeholder_match(arg) if "=" in arg else None
+            if match is None:
+                shared.errprint(
+                    "'Toggle' style placeholders such as '{}' require"
+                    " accompanying pre/post values in this operation.".format(
+                        arg
+                    )
+                )
+                return False
+            key = match.group("toggle")
             if key in togglevalues_for_names:
-                togglevalues_for_names[key] = [
-                    toggle_match.group(2),
-                    toggle_match.group(3),
-                ]
-                remove_if_present(arg, unused_args)
+                togglevalues_for_names[key] = list(
+                    match.group("untoggled", "toggled")
+                )
+                unused_args.pop(arg, None)
             continue
-        if arg[0] == "+":
-            shared.errprint(
-                "'Toggle' style placeholders such as '{}' require accompanying"
-                " pre/post values in this operation.".format(arg)
-            )
-            return False
-        nontoggle_match = PLACEHOLDER_RE.match(arg)
-        if nontoggle_match is None:
+        nontoggle_parts = split_nontoggle_arg(arg)
+        if nontoggle_parts is None:
             continue
-        modifiers_prefix = nontoggle_match.group(1)
-        key = nontoggle_match.group(2)
-        value = nontoggle_match.group(3)
+        modifiers_prefix, key, value = nontoggle_parts
         if key in RESERVED_PLACEHOLDERS:
             shared.errprint(
                 "Can't specify reserved placeholder '{}'.".format(key)
@@ -371,9 +525,9 @@ def update_default_values_from_args(
                 " this operation.".format(modifiers_prefix)
             )
             return False
-        if key in valid_non_toggles:
+        if key in values_for_names:
             values_for_names[key] = value
-            remove_if_present(arg, unused_args)
+            unused_args.pop(arg, None)
     return True
 
 
@@ -383,7 +537,9 @@ def command_with_values(
     """Fetch the indicated command dictionary, modified by placeholder args.
 
     Load the command with :func:`.command_impl_core.read_dict`, returning
-    ``None`` if that fails.
+    ``None`` if that fails. Also return ``None`` if
+    :func:`placeholders_match_cmdline` finds that the stored placeholder info
+    is stale.
 
     Update the ``args`` dictionary of the command with ``values_for_reserved``.
     Then process the loaded command :func:`update_runtime_values_from_args` or
@@ -399,7 +555,7 @@ def command_with_values(
     :type all_args:             list[str]
     :param unused_args:         placeholder arguments unused by any command in
                                 current sequence; to modify
-    :type unused_args:          list[str]
+    :type unused_args:          dict[str, None]
     :param values_for_reserved: values for internally-populated "reserved"
                                 placeholder names
     :type values_for_reserved:  dict[str, str]
@@ -415,6 +571,14 @@ def command_with_values(
     except FileNotFoundError:
         shared.errprint("Command '{}' does not exist.".format(cmd))
         return None
+    if not placeholders_match_cmdline(cmd_dict):
+        shared.errprint(
+            "Command '{}' has placeholders that don't match its commandline"
+            " (it was probably stored by an earlier version of chaintool)."
+            " Set its commandline again with 'chaintool cmd set' or"
+            " 'chaintool cmd edit'.".format(cmd)
+        )
+        return None
     values_for_names = cmd_dict["args"]
     for r_k, r_v in values_for_reserved.items():
         if r_k in values_for_names:
@@ -441,10 +605,10 @@ def command_with_values(
 def process_cmdline(cmdline, handle_placeholder_fun):
     """Modify placeholder tokens in a commandline, using the provided func.
 
-    Walk the commandline looking for tokens enclosed in single curly-braces.
-    Pass each such token to the ``handle_placeholder_fun`` and replace it
-    with the result of that function. Return the resulting updated
-    commandline.
+    Scan the commandline with :const:`CMDLINE_TOKEN_RE` looking for tokens
+    enclosed in single curly-braces. Pass each such token to the
+    ``handle_placeholder_fun`` and replace it with the result of that
+    function. Return the resulting updated commandline.
 
     :param cmdline:                commandline to update
     :type cmdline:                 str
@@ -456,28 +620,33 @@ def process_cmdline(cmdline, handle_placeholder_fun):
     :rtype:   str
 
     """
-    placeholder = ""
-    cmdline_format = ""
-    prev_undoubled_brace = None
-    for char in cmdline:
-        char_is_brace = char in ("{", "}")
-        if not placeholder:
-            if prev_undoubled_brace == "{" and not char_is_brace:
-                placeholder = char
-            else:
-                cmdline_format += char
-        else:
-            if char == "}" and prev_undoubled_brace != "}":
-                cmdline_format += handle_placeholder_fun(placeholder)
-                cmdline_format += char
-                placeholder = ""
-            else:
-                placeholder += char
-        if char == prev_undoubled_brace:
-            prev_undoubled_brace = None
-        elif char_is_brace:
-            prev_undoubled_brace = char
-    return cmdline_format
+    # Without an open-brace there can't be any placeholder tokens.
+    if "{" not in cmdline:
+        return cmdline
+
+    def replace_token(match):
+        """Generate the replacement for a :const:`CMDLINE_TOKEN_RE` match.
+
+        Doubled braces are passed through unchanged. A placeholder token is
+        replaced with the result of ``handle_placeholder_fun``, still
+        enclosed in braces. An unterminated token is dropped, except for its
+        open-brace.
+
+        :param match: match for a doubled brace or placeholder token
+        :type match:  re.Match
+
+        :returns: replacement text
+        :rtype:   str
+
+        """
+        placeholder = match.group(1)
+        if placeholder is None:
+            return match.group(0)
+        if not match.group(2):
+            return "{"
+        return "{" + handle_placeholder_fun(placeholder) + "}"
+
+    return CMDLINE_TOKEN_RE.sub(replace_token, cmdline)
 
 
 def handle_update_placeholder(placeholder, args_dict, toggle_args_dict):
@@ -515,23 +684,25 @@ def handle_update_placeholder(placeholder, args_dict, toggle_args_dict):
     :rtype:   str
 
     """
-    toggle_match = PLACEHOLDER_TOGGLE_RE.match(placeholder)
-    if toggle_match:
-        key = toggle_match.group(1)
+    match = None
+    if "=" in placeholder or "/" in placeholder or placeholder[:1] == "+":
+        # Only a token with a value, modifiers, or toggle needs parsing.
+        match = PLACEHOLDER_RE.match(placeholder)
+    if match is None:
+        # Bare name, or (shouldn't happen if our input vetting was correct)
+        # an unparseable token.
+        modifiers_prefix = ""
+        key = placeholder
+    elif match.group("toggle") is not None:
+        key = match.group("toggle")
         if key not in toggle_args_dict:
             # Weird, but we'll handle it.
             return placeholder
         untoggled_value = explode_literal_braces(toggle_args_dict[key][0])
         toggled_value = explode_literal_braces(toggle_args_dict[key][1])
         return key + "=" + untoggled_value + ":" + toggled_value
-    nontoggle_match = PLACEHOLDER_RE.match(placeholder)
-    if nontoggle_match is None:
-        # Shouldn't happen if our input vetting was correct.
-        modifiers_prefix = ""
-        key = placeholder
     else:
-        modifiers_prefix = nontoggle_match.group(1)
-        key = nontoggle_match.group(2)
+        modifiers_prefix, key = match.group("modifiers", "name")
     if key not in args_dict:
         # Weird, but we'll handle it.
         return placeholder
@@ -541,6 +712,108 @@ def handle_update_placeholder(placeholder, args_dict, toggle_args_dict):
     return modifiers_prefix + key + "=" + value
 
 
+def handle_format_placeholder(placeholder):
+    """Reduce a placeholder token to the field name used in a format string.
+
+    Note that :func:`cmdline_format` passes this function to
+    :func:`process_cmdline` to generate a format string from a commandline.
+
+    Return the placeholder name as extracted from the token, prefixed with
+    any modifiers, and dropping any value(s) specified in the token. Or the
+    unmodified token, if it can't be parsed. (This is the same result that
+    :func:`handle_set_placeholder` returns for the token.)
+
+    :param placeholder: placeholder token to process
+    :type placeholder:  str
+
+    :returns: the replacement token for the format string
+    :rtype:   str
+
+    """
+    match = PLACEHOLDER_RE.match(placeholder)
+    if match is None:
+        return placeholder
+    if match.group("toggle") is not None:
+        return match.group("toggle")
+    return match.group("modifiers") + match.group("name")
+
+
+def cmdline_format(cmdline):
+    """Generate the format string for a commandline.
+
+    Pass the commandline and :func:`handle_format_placeholder` to
+    :func:`process_cmdline` to get a version of the commandline with only
+    placeholder names (plus modifiers) in its placeholder tokens. This can
+    then be used with the :meth:`str.format` method to substitute placeholder
+    values.
+
+    The format string isn't stored in the command dictionary since it is
+    cheap to generate from the commandline, and only needed by "run".
+
+    :param cmdline: commandline to process
+    :type cmdline:  str
+
+    :returns: the format string
+    :rtype:   str
+
+    """
+    return process_cmdline(cmdline, handle_format_placeholder)
+
+
+@functools.lru_cache(maxsize=64)
+def cmdline_format_parts(cmdline):
+    """Generate the pre-parsed format for a commandline.
+
+    Parse the format string from :func:`cmdline_format` once with
+    :meth:`string.Formatter.parse`, so that rendering the commandline (see
+    :func:`render_cmdline`) doesn't have to re-parse the format string each
+    time. Results are cached per commandline.
+
+    Placeholder names are validated when a command is defined, so they never
+    include the attribute/index/conversion/spec syntax of format strings;
+    only the literal text and field name of each parsed element is kept.
+
+    :param cmdline: commandline to process
+    :type cmdline:  str
+
+    :returns: 2-tuples of literal text and the following placeholder name (or
+              ``None`` for trailing literal text)
+    :rtype:   tuple[tuple[str, str | None], ...]
+
+    """
+    return tuple(
+        (literal, field)
+        for literal, field, _, _ in string.Formatter().parse(
+            cmdline_format(cmdline)
+        )
+    )
+
+
+def render_cmdline(cmdline, values):
+    """Substitute placeholder values into a commandline.
+
+    Equivalent to using the format string from :func:`cmdline_format` with
+    :meth:`str.format`, but works from the cached pre-parsed elements from
+    :func:`cmdline_format_parts`.
+
+    :param cmdline: commandline to render
+    :type cmdline:  str
+    :param values:  dict of placeholder values, keyed by placeholder name
+                    (plus modifiers)
+    :type values:   dict[str, str]
+
+    :raises: KeyError if the commandline uses a placeholder not in ``values``
+
+    :returns: the commandline with placeholder values substituted
+    :rtype:   str
+
+    """
+    return "".join(
+        literal if field is None else literal + str(values[field])
+        for literal, field in cmdline_format_parts(cmdline)
+    )
+
+
 def update_cmdline(cmd_dict):
     """Make a commandline consistent with (updated) placeholder values.
 
@@ -667,7 +940,7 @@ def check_toggle_errors(
     :type error_sets:              dict[str, set[str]]
 
     """
-    if not ALPHANUM_RE.match(key[1:]):
+    if not is_alphanum_name(key[1:]):
         error_sets["non_alphanum_names"].add(key)
     if key[1:] in values_for_names:
         error_sets["toggle_dup_names"].add(key[1:])
@@ -684,9 +957,9 @@ def check_placeholder_errors(  # pylint: disable=too-many-arguments
 ):
     """Check a placeholder token in an input commandline for errors.
 
-    If the ``key`` begins with "+", delegate to :func:`check_toggle_errors`.
-    Otherwise, use the provided info to check for violations in (non-toggle)
-    placeholder syntax. Update ``error_sets`` with any discovered violations.
+    Use the provided info to check for violations in (non-toggle) placeholder
+    syntax. Update ``error_sets`` with any discovered violations. (Toggle
+    tokens are instead handed to :func:`check_toggle_errors` by the caller.)
 
     :param key:                    placeholder name from the token
     :type key:                     str
@@ -704,17 +977,12 @@ def check_placeholder_errors(  # pylint: disable=too-many-arguments
     :type error_sets:              dict[str, set[str]]
 
     """
-    if key[0] == "+":
-        check_toggle_errors(
-            key, value, values_for_names, togglevalues_for_names, error_sets
-        )
-        return
-    if not ALPHANUM_RE.match(key):
+    if not is_alphanum_name(key):
         error_sets["non_alphanum_names"].add(key)
     if key in RESERVED_PLACEHOLDERS:
         if value is not None:
             error_sets["reserved_defaults"].add(key)
-    if not valid_modifiers(modifiers):
+    if modifiers and not valid_modifiers(modifiers):
         error_sets["invalid_modifiers"].add(key)
     if "+" + key in togglevalues_for_names:
         error_sets["toggle_dup_names"].add(key)
@@ -741,6 +1009,8 @@ def handle_set_placeholder(
     - If the placeholder token is for a toggle (with values), call
       :func:`check_toggle_errors` and store the values in
       ``togglevalues_for_names``.
+    - If the placeholder token is for a toggle without values, call
+      :func:`check_toggle_errors` with a ``None`` value.
     - If the placeholder token is for a non-toggle, call
       :func:`check_placeholder_errors` and store the value in
       ``values_for_names`` (storing ``None`` if no value). If there are
@@ -771,30 +1041,40 @@ def handle_set_placeholder(
     :rtype:   str
 
     """
-    toggle_match = PLACEHOLDER_TOGGLE_RE.match(placeholder)
-    if toggle_match:
-        key = toggle_match.group(1)
-        untoggled_value = collapse_literal_braces(toggle_match.group(2))
-        toggled_value = collapse_literal_braces(toggle_match.group(3))
+    match = PLACEHOLDER_RE.match(placeholder)
+    if match is None:
+        # Placeholder name format error checks will trigger later.
+        modifiers_prefix = ""
+        key = placeholder
+        value = None
+        if key[:1] == "+":
+            check_toggle_errors(
+                key,
+                value,
+                values_for_names,
+                togglevalues_for_names,
+                error_sets,
+            )
+            values_for_names[key] = value
+            return key
+    elif match.group("toggle") is not None:
+        key = match.group("toggle")
+        untoggled_value = collapse_literal_braces(match.group("untoggled"))
+        toggled_value = collapse_literal_braces(match.group("toggled"))
         value = [untoggled_value, toggled_value]
         check_toggle_errors(
             key, value, values_for_names, togglevalues_for_names, error_sets
         )
         togglevalues_for_names[key] = value
         return key
-    nontoggle_match = PLACEHOLDER_RE.match(placeholder)
-    if nontoggle_match is None:
-        # Placeholder name format error checks will trigger later.
-        modifiers_prefix = ""
-        key = placeholder
-        value = None
     else:
-        modifiers_prefix = nontoggle_match.group(1)
-        key = nontoggle_match.group(2)
-        value = nontoggle_match.group(3)
+        modifiers_prefix, key, value = match.group(
+            "modifiers", "name", "value"
+        )
         if value is not None:
             value = collapse_literal_braces(value)
-    modifiers = modifiers_prefix.split("/")[:-1]
+    # A non-empty modifiers prefix always ends with "/".
+    modifiers = modifiers_prefix[:-1].split("/") if modifiers_prefix else []
     check_placeholder_errors(
         key,
         modifiers,
@@ -805,30 +1085,169 @@ def handle_set_placeholder(
     )
     values_for_names[key] = value
     if modifiers:
-        if key in modifiers_for_names:
-            modifiers_for_names[key].append(modifiers)
-        else:
-            modifiers_for_names[key] = [modifiers]
+        modifiers_for_names.setdefault(key, []).append(modifiers)
     return modifiers_prefix + key
 
 
+def parse_cmdline(cmdline):
+    """Build a command dictionary from a commandline.
+
+    Make a wrapper for :func:`handle_set_placeholder` to capture the mutable
+    containers that we'll be updating. This results in a function that can
+    accumulate placeholder and error info while processing the placeholder
+    tokens. Pass the commandline and the wrapper function to
+    :func:`process_cmdline`.
+
+    Return a command dictionary holding the commandline and the accumulated
+    placeholder info, along with the accumulated error info (for
+    :func:`print_errors`). The command dictionary should not be used if any
+    errors were found.
+
+    :param cmdline: commandline
+    :type cmdline:  str
+
+    :returns: command dictionary, and accumulated error info
+    :rtype:   tuple[dict[str, str], dict[str, set[str]]]
+
+    """
+    values_for_names = dict()
+    modifiers_for_names = dict()
+    togglevalues_for_names = dict()
+    error_sets = {
+        "non_alphanum_names": set(),
+        "reserved_defaults": set(),
+        "invalid_modifiers": set(),
+        "multi_value_names": set(),
+        "multi_togglevalue_names": set(),
+        "toggles_without_values": set(),
+        "toggle_dup_names": set(),
+    }
+
+    def handle_set_placeholder_wrapper(placeholder):
+        return handle_set_placeholder(
+            placeholder,
+            values_for_names,
+            modifiers_for_names,
+            togglevalues_for_names,
+            error_sets,
+        )
+
+    process_cmdline(cmdline, handle_set_placeholder_wrapper)
+    cmd_dict = {
+        "cmdline": cmdline,
+        "args": values_for_names,
+        "args_modifiers": modifiers_for_names,
+        "toggle_args": togglevalues_for_names,
+    }
+    return cmd_dict, error_sets
+
+
+@functools.lru_cache(maxsize=64)
+def cmdline_placeholder_names(cmdline):
+    """Get the names of the placeholders in a commandline.
+
+    Results are cached per commandline, since this is checked on every
+    "run" and "vals" of a command (see :func:`placeholders_match_cmdline`).
+
+    :param cmdline: commandline
+    :type cmdline:  str
+
+    :returns: non-toggle placeholder names, and toggle placeholder names
+    :rtype:   tuple[frozenset[str], frozenset[str]]
+
+    """
+    cmd_dict, _ = parse_cmdline(cmdline)
+    return frozenset(cmd_dict["args"]), frozenset(cmd_dict["toggle_args"])
+
+
+def placeholders_match_cmdline(cmd_dict):
+    """Check that a command's stored placeholders match its commandline.
+
+    A command stored by an earlier chaintool version could have a
+    commandline that is now parsed differently, e.g. "{x=a}} {y}" (see
+    :func:`upgrade_cmd_dict`). Using its stored placeholder info with the
+    reparsed commandline would silently drop placeholders and values.
+
+    :param cmd_dict: command dictionary
+    :type cmd_dict:  dict[str, str]
+
+    :returns: whether the placeholder names in the commandline are the same
+              as the ones in the command dictionary
+    :rtype:   bool
+
+    """
+    arg_names, toggle_names = cmdline_placeholder_names(cmd_dict["cmdline"])
+    return arg_names == set(cmd_dict["args"]) and toggle_names == set(
+        cmd_dict["toggle_args"]
+    )
+
+
+def upgrade_cmd_dict(cmd_dict):
+    """Bring a command dictionary stored by an earlier version up to date.
+
+    Commands stored before schema version 1 have a "format" property, which
+    is now derived from the commandline when needed. Their placeholder info
+    was also derived with the older parsing rules, which treated doubled
+    braces inside a placeholder value as the end of the token. Drop the
+    "format" property and re-derive the placeholder info from the
+    commandline with :func:`parse_cmdline`.
+
+    If the commandline has errors under the current rules, leave the
+    placeholder info alone; :func:`command_with_values` will refuse to use
+    the command until it is set again.
+
+    :param cmd_dict: command dictionary; to modify
+    :type cmd_dict:  dict[str, str]
+
+    :returns: whether the placeholder names changed, or couldn't be updated
+    :rtype:   bool
+
+    """
+    cmd_dict.pop("format", None)
+    new_dict, error_sets = parse_cmdline(cmd_dict["cmdline"])
+    if any(error_sets.values()):
+        return True
+    changed = set(new_dict["args"]) != set(cmd_dict["args"]) or set(
+        new_dict["toggle_args"]
+    ) != set(cmd_dict["toggle_args"])
+    cmd_dict.update(new_dict)
+    return changed
+
+
+def upgrade_stored_commands():
+    """Update all stored commands with :func:`upgrade_cmd_dict`.
+
+    Called by :func:`.command_impl_core.init` when the stored data is
+    from before schema version 1. Warn about any command whose placeholders
+    changed, since the user may want to check and re-set it.
+
+    """
+    for cmd in command_impl_core.all_names():
+        try:
+            cmd_dict = command_impl_core.read_dict(cmd)
+        except FileNotFoundError:
+            continue
+        if upgrade_cmd_dict(cmd_dict):
+            print(
+                shared.MSG_WARN_PREFIX
+                + " command '{0}' is parsed differently by this version of"
+                " chaintool; check its placeholders with 'chaintool cmd"
+                " print {0}'.".format(cmd)
+            )
+        command_impl_core.write_dict(cmd, cmd_dict, "w")
+
+
 def define(cmd, cmdline, overwrite, print_after_set, compact):
     """Create or update a command to consist of the given commandline.
 
     Do some initial validation of ``cmd`` and ``cmdline`` to check that they
     are non-empty and consist of legal characters.
 
-    Make a wrapper for :func:`handle_set_placeholder` to capture the mutable
-    containers that we'll be updating. This results in a function that can
-    accumulate placeholder and error info while processing the placeholder
-    tokens. Pass the input commandline and the wrapper function to
-    :func:`process_cmdline` to get the format string for the commandline.
-
-    Call :func:`print_errors` to print about any detected errors, and if there
-    are any, bail out with error status.
+    Call :func:`parse_cmdline` to build the command dictionary from the
+    input commandline. Call :func:`print_errors` to print about any detected
+    errors, and if there are any, bail out with error status.
 
-    Store the input commandline, the generated format string, and the
-    accumulated placeholder info in the command dictionary.
+    Otherwise store the command dictionary.
 
     Finally, if ``print_after_set`` is ``True``, pretty-print the command that
     we just created/updated.
@@ -864,39 +1283,10 @@ def define(cmd, cmdline, overwrite, print_after_set, compact):
         shared.errprint("cmdline must be nonempty.")
         print()
         return 1
-    values_for_names = dict()
-    modifiers_for_names = dict()
-    togglevalues_for_names = dict()
-    error_sets = {
-        "non_alphanum_names": set(),
-        "reserved_defaults": set(),
-        "invalid_modifiers": set(),
-        "multi_value_names": set(),
-        "multi_togglevalue_names": set(),
-        "toggles_without_values": set(),
-        "toggle_dup_names": set(),
-    }
-
-    def handle_set_placeholder_wrapper(placeholder):
-        return handle_set_placeholder(
-            placeholder,
-            values_for_names,
-            modifiers_for_names,
-            togglevalues_for_names,
-            error_sets,
-        )
-
-    cmdline_format = process_cmdline(cmdline, handle_set_placeholder_wrapper)
+    cmd_dict, error_sets = parse_cmdline(cmdline)
     if print_errors(error_sets):
         print()
         return 1
-    cmd_dict = {
-        "cmdline": cmdline,
-        "format": cmdline_format,
-        "args": values_for_names,
-        "args_modifiers": modifiers_for_names,
-        "toggle_args": togglevalues_for_names,
-    }
     if overwrite:
         mode = "w"
     else:
@@ -931,13 +1321,118 @@ def delete(cmd, is_not_found_ok):
              is_not_found_ok is False
 
     """
+    command_impl_core.invalidate_dict(cmd)
     try:
-        os.remove(os.path.join(CMD_DIR, cmd))
+        os.remove(command_impl_core.cmd_path(cmd))
     except FileNotFoundError:
         if not is_not_found_ok:
             raise
 
 
+def shell_free_argv(cmdline):
+    """Split a commandline into an argv list, if it doesn't need a shell.
+
+    Return ``None`` (meaning that the commandline should be given to the
+    shell) unless all of these are true: we're on a POSIX system, the
+    commandline only contains characters from :const:`SHELL_FREE_RE`, its
+    first word is not in :const:`SHELL_ONLY_WORDS`, and its first word is not
+    a variable assignment. In that case the shell would just split the
+    commandline on spaces and execute it, so return that split.
+
+    :param cmdline: commandline to examine
+    :type cmdline:  str
+
+    :returns: argv list for the commandline, or ``None`` if a shell is needed
+    :rtype:   list[str] | None
+
+    """
+    if os.name != "posix" or SHELL_FREE_RE.match(cmdline) is None:
+        return None
+    argv = cmdline.split()
+    if not argv or argv[0] in SHELL_ONLY_WORDS or "=" in argv[0]:
+        return None
+    return argv
+
+
+def signal_notice(signum):
+    """Get the notice a shell would print for a command killed by a signal.
+
+    Like the shell, return no notice for SIGINT or SIGPIPE, since in those
+    cases the cause is already obvious to the user.
+
+    :param signum: number of the signal that killed the command
+    :type signum:  int
+
+    :returns: notice describing the signal (e.g. "Terminated"), or ``None``
+    :rtype:   str | None
+
+    """
+    if signum in (signal.SIGINT, signal.SIGPIPE):
+        return None
+    description = None
+    if hasattr(signal, "strsignal"):
+        try:
+            description = signal.strsignal(signum)
+        except ValueError:
+            pass
+    else:
+        # signal.strsignal requires Python 3.8 or later.
+        try:
+            description = signal.Signals(signum).name
+        except ValueError:
+            pass
+    if description is None:
+        description = "Signal {}".format(signum)
+    return description
+
+
+def run_cmdline(cmdline, capture):
+    """Execute a commandline, bypassing the shell when it's not needed.
+
+    If :func:`shell_free_argv` returns an argv list for this commandline,
+    execute it directly, which avoids the cost of starting a shell process.
+    If that fails to launch (e.g. no such executable), or there is no argv
+    list, then execute the commandline through the shell as usual; among
+    other things that gets the shell's usual error messages.
+
+    When executed directly, a negative exit status (death by signal) is
+    converted to the 128+N value that the shell would have reported, and the
+    notice that the shell would have printed to stderr (from
+    :func:`signal_notice`) is emitted. If ``capture`` is set, the notice is
+    appended to the captured stderr instead, as the shell's would have been.
+
+    :param cmdline: commandline to execute
+    :type cmdline:  str
+    :param capture: whether to capture stdout/stderr (as text)
+    :type capture:  bool
+
+    :returns: info about the completed process
+    :rtype:   subprocess.CompletedProcess
+
+    """
+    argv = shell_free_argv(cmdline)
+    if argv is not None:
+        try:
+            result = subprocess.run(
+                argv, capture_output=capture, check=False, text=capture
+            )
+        except OSError:
+            pass
+        else:
+            if result.returncode < 0:
+                notice = signal_notice(-result.returncode)
+                if notice is not None:
+                    if capture:
+                        result.stderr += notice + "\n"
+                    else:
+                        sys.stderr.write(notice + "\n")
+                result.returncode = 128 - result.returncode
+            return result
+    return subprocess.run(
+        cmdline, capture_output=capture, shell=True, check=False, text=capture
+    )
+
+
 def run(cmd, quiet, args, unused_args, rsv_ctx):
     """Run a command.
 
@@ -947,11 +1442,12 @@ def run(cmd, quiet, args, unused_args, rsv_ctx):
     :func:`command_with_values`. If that fails, bail out with error status.
 
     Generate the commandline to execute by using the keys/values from this
-    command dictionary with the command's format string. Invoke
+    command dictionary with the command's format (via
+    :func:`render_cmdline`). Invoke
     :func:`.virtual_tools.dispatch` to see whether the command is a "virtual
     tool" that should be executed internally (and do so). If so, then return
     the status from the virtual tool. If not, then execute the commandline
-    via :func:`subprocess.run` and return its exit status.
+    via :func:`run_cmdline` and return its exit status.
 
     Note that if ``rsv_ctx.stdout_requested`` is ``False``, the output of the
     command will be printed as it is generated, and ``rsv_ctx.stdout`` will be
@@ -969,7 +1465,7 @@ def run(cmd, quiet, args, unused_args, rsv_ctx):
     :type args:         list(str)
     :param unused_args: placeholder arguments unused by any command in
                         current sequence; to modify
-    :type unused_args:  list[str]
+    :type unused_args:  dict[str, None]
     :param rsv_ctx:     contains stdout from prev cmd (if needed here) and
                         will contain stdout for next (if requested); to modify
     :type rsv_ctx:      ReservedPlaceholdersCtx
@@ -991,7 +1487,7 @@ def run(cmd, quiet, args, unused_args, rsv_ctx):
             print()
         rsv_ctx.stdout = None
         return 1
-    cmdline = cmd_dict["format"].format(**cmd_dict["args"])
+    cmdline = render_cmdline(cmd_dict["cmdline"], cmd_dict["args"])
     if not quiet:
         print(Fore.CYAN + cmdline + Fore.RESET)
         print()
@@ -1002,15 +1498,11 @@ def run(cmd, quiet, args, unused_args, rsv_ctx):
         rsv_ctx.stdout = None
         return vtool_status
     if rsv_ctx.stdout_requested:
-        result = subprocess.run(
-            cmdline, capture_output=True, shell=True, check=False, text=True
-        )
+        result = run_cmdline(cmdline, True)
         rsv_ctx.stdout = result.stdout
         print(result.stdout, end="")
     else:
-        result = subprocess.run(
-            cmdline, capture_output=False, shell=True, check=False
-        )
+        result = run_cmdline(cmdline, False)
         rsv_ctx.stdout = None
     if not quiet:
         print()
@@ -1025,7 +1517,9 @@ def vals(cmd, args, unused_args, print_after_set, compact):
     :func:`command_with_values`. If that fails, bail out with error status.
 
     Call :func:`update_cmdline` to update the stored commandline to match the
-    new placeholder values, and write back the new command dictionary.
+    new placeholder values, and write back the new command dictionary. (If
+    the result is identical to what is already stored, e.g. re-applying the
+    current values, skip the write.)
 
     Finally, if ``print_after_set`` is ``True``, pretty-print the command that
     we just updated.
@@ -1036,7 +1530,7 @@ def vals(cmd, args, unused_args, print_after_set, compact):
     :type args:             list(str)
     :param unused_args:     placeholder arguments unused by any command in
                             current sequence; to modify
-    :type unused_args:      list[str]
+    :type unused_args:      dict[str, None]
     :param print_after_set: whether to automatically trigger "print" operation
                             at the end
     :type print_after_set:  bool
@@ -1051,7 +1545,11 @@ def vals(cmd, args, unused_args, print_after_set, compact):
     if cmd_dict is None:
         return 1
     update_cmdline(cmd_dict)
-    command_impl_core.write_dict(cmd, cmd_dict, "w")
+    # Command files written by earlier chaintool versions also stored the
+    # format string; it's no longer used, so don't carry it along.
+    cmd_dict.pop("format", None)
+    if cmd_dict != command_impl_core.read_dict_if_exists(cmd):
+        command_impl_core.write_dict(cmd, cmd_dict, "w")
     print("Command '{}' updated.".format(cmd))
     print()
     if print_after_set:
@@ -30,8 +30,11 @@ __all__ = [
 ]
 
 
+import functools
 import shlex
 
+from dataclasses import dataclass
+
 from colorama import Fore
 
 from . import command_impl_core
@@ -39,13 +42,50 @@ from . import shared
 from . import virtual_tools
 
 
+# Section headers for print_one.
+CMDLINE_HEADER = Fore.MAGENTA + "* commandline format:" + Fore.RESET
+REQUIRED_HEADER = Fore.MAGENTA + "* required values:" + Fore.RESET
+OPTIONAL_HEADER = Fore.MAGENTA + "* optional values with default:" + Fore.RESET
+TOGGLE_HEADER = (
+    Fore.MAGENTA + "* toggles with untoggled:toggled values:" + Fore.RESET
+)
+# Section headers for print_multi.
+MULTI_COMMANDS_HEADER = Fore.MAGENTA + "** commands:" + Fore.RESET
+MULTI_CMDLINE_HEADER = Fore.MAGENTA + "** commandline formats:" + Fore.RESET
+MULTI_REQUIRED_HEADER = Fore.MAGENTA + "** required values:" + Fore.RESET
+MULTI_OPTIONAL_HEADER = (
+    Fore.MAGENTA + "** optional values with default:" + Fore.RESET
+)
+MULTI_TOGGLE_HEADER = (
+    Fore.MAGENTA + "** toggles with untoggled:toggled values:" + Fore.RESET
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def quote_value(value):
+    """Shell-quote a placeholder value for display.
+
+    This is just :func:`shlex.quote`, but cached; when printing a group of
+    commands, the same few values tend to get quoted over and over.
+
+    :param value: value to quote
+    :type value:  str
+
+    :returns: the quoted value
+    :rtype:   str
+
+    """
+    return shlex.quote(value)
+
+
 def print_one(cmd):
     """Pretty-print the info for a command.
 
     Read the command dictionary, and bail out if it does not exist.
 
     Pretty-print the placeholder info separated into "required values" (no
-    default), "optional values", and "toggles".
+    default), "optional values", and "toggles". The output lines are
+    collected and then printed all at once.
 
     :param cmd: name of command to print
     :type cmd:  str
@@ -67,62 +107,97 @@ def print_one(cmd):
             all_required_placeholders.append(key)
         else:
             all_optional_placeholders.append(key)
-    all_toggle_placeholders = list(cmd_dict["toggle_args"].keys())
-    print(Fore.MAGENTA + "* commandline format:" + Fore.RESET)
-    print(cmd_dict["cmdline"])
+    all_toggle_placeholders = sorted(cmd_dict["toggle_args"])
+    out = []
+    out.append(CMDLINE_HEADER)
+    out.append(cmd_dict["cmdline"])
     if all_required_placeholders:
-        print()
-        print(Fore.MAGENTA + "* required values:" + Fore.RESET)
+        out.append("")
+        out.append(REQUIRED_HEADER)
         all_required_placeholders.sort()
-        for placeholder in all_required_placeholders:
-            print(placeholder)
+        out.extend(all_required_placeholders)
     if all_optional_placeholders:
-        print()
-        print(Fore.MAGENTA + "* optional values with default:" + Fore.RESET)
+        out.append("")
+        out.append(OPTIONAL_HEADER)
         all_optional_placeholders.sort()
         for placeholder in all_optional_placeholders:
-            print(
+            out.append(
                 "{} = {}".format(
-                    placeholder, shlex.quote(cmd_dict["args"][placeholder])
+                    placeholder, quote_value(cmd_dict["args"][placeholder])
                 )
             )
     if all_toggle_placeholders:
-        print()
-        print(
-            Fore.MAGENTA
-            + "* toggles with untoggled:toggled values:"
-            + Fore.RESET
-        )
-        all_toggle_placeholders.sort()
+        out.append("")
+        out.append(TOGGLE_HEADER)
         for placeholder in all_toggle_placeholders:
             togglevals = cmd_dict["toggle_args"][placeholder]
-            print(
+            out.append(
                 "{} = {}:{}".format(
                     placeholder,
-                    shlex.quote(togglevals[0]),
-                    shlex.quote(togglevals[1]),
+                    quote_value(togglevals[0]),
+                    quote_value(togglevals[1]),
                 )
             )
-    print()
+    out.append("")
+    print("\n".join(out))
     return 0
 
 
-def init_print_info_collections(  # pylint: disable=too-many-arguments
-    commands,
-    command_dicts,
-    command_dicts_by_cmd,
-    commands_by_placeholder,
-    placeholders_sets,
-    ignore_env,
-):
+@dataclass
+class PrintInfo:
+    """Info gathered to pretty-print multiple commands.
+
+    See :func:`gather_print_info` for a description of each field.
+
+    """
+
+    commands_display: str
+    command_dicts: list
+    command_dicts_by_cmd: dict
+    commands_by_placeholder: dict
+    placeholders_sets: dict
+
+
+def share_placeholder_groups(commands_by_placeholder):
+    """Make placeholders used by the same commands share one list object.
+
+    Modify ``commands_by_placeholder`` in place so that any placeholders
+    whose command-name lists are equal get the same list object as their
+    value, so that grouping them later can compare by identity.
+
+    :param commands_by_placeholder: dict keyed by placeholder name where the
+                                    value is a list of names of commands
+                                    where that placeholder appears
+    :type commands_by_placeholder:  dict[str, list[str]]
+
+    """
+    interned_groups = dict()
+    for placeholder, group in commands_by_placeholder.items():
+        commands_by_placeholder[placeholder] = interned_groups.setdefault(
+            tuple(group), group
+        )
+
+
+def gather_print_info(commands, ignore_env):
     """Gather info useful to pretty-print multiple commands.
 
-    Iterate through the ``commands``, for each command reading its dictionary
-    and using the args info (placeholders+values) to populate the various
-    inout collections arguments.
+    Read the dictionaries for all of the ``commands`` (concurrently, via
+    :func:`.command_impl_core.read_dicts`). Iterate through the commands, for
+    each command using the args info (placeholders+values) to populate the
+    various collections in the returned :class:`PrintInfo`:
 
-    Populating ``command_dicts``, ``command_dicts_by_cmd``, and
-    ``commands_by_placeholder`` is straightforward.
+    - ``command_dicts``: list of command dictionaries (for commands that
+      exist), with the command name added to each as "name"
+    - ``command_dicts_by_cmd``: dict of command dictionaries, keyed by
+      command name
+    - ``commands_by_placeholder``: dict keyed by placeholder name where the
+      value is a list of names of commands where that placeholder appears
+    - ``placeholders_sets``: dict with keys "required", "optional", and
+      "toggle", where each value is a set of placeholders of that type
+
+    Populating the first three is straightforward. Once done,
+    :func:`share_placeholder_groups` is applied to
+    ``commands_by_placeholder``.
 
     Deciding which "set" a placeholder name belongs in, to populate
     ``placeholders_sets``, goes according to the following rules:
@@ -135,36 +210,23 @@ def init_print_info_collections(  # pylint: disable=too-many-arguments
       "optional" set.
     - Any toggle placeholder goes into the "toggle" set.
 
-    Finally, return a string that lists the command names, with any
-    non-existing command highlighted in red.
+    Also build ``commands_display``, a string that lists the command names,
+    with any non-existing command highlighted in red.
 
-    :param commands:                list of command names
-    :type commands:                 list[str]
-    :param command_dicts:           list of command dictionaries, initially
-                                    empty; to modify
-    :type command_dicts:            list[dict[str, str]]
-    :param command_dicts_by_cmd:    dict of command dictionaries, keyed by
-                                    command name, initially empty; to modify
-    :type command_dicts_by_cmd:     dict[str, dict[str, str]]
-    :param commands_by_placeholder: dict keyed by placeholder name where the
-                                    value is a list of names of commands where
-                                    that placeholder appears, initially empty;
-                                    to modify
-    :type commands_by_placeholder:  dict[str, dict[str, str]]
-    :param placeholders_sets:       dict with keys "required", "optional",
-                                    and "toggle", where each value is a set
-                                    of placeholders of that type, sets
-                                    initially empty; to modify
-    :type placeholders_sets:        dict[str, set[str]]
-    :param ignore_env:              whether to ignore the effects of
-                                    chaintool-env; will be True for
-                                    non-sequence prints
-    :type ignore_env:               bool
-
-    :returns: pretty-printed string containing command names
-    :rtype:   str
+    :param commands:   list of command names
+    :type commands:    list[str]
+    :param ignore_env: whether to ignore the effects of chaintool-env; will
+                       be True for non-sequence prints
+    :type ignore_env:  bool
+
+    :returns: the gathered info
+    :rtype:   PrintInfo
 
     """
+    command_dicts = []
+    command_dicts_by_cmd = dict()
+    commands_by_placeholder = dict()
+    placeholders_sets = {"required": set(), "optional": set(), "toggle": set()}
 
     def record_placeholder(cmd, placeholder):
         """Mark that a command uses a placeholder.
@@ -177,20 +239,15 @@ def init_print_info_collections(  # pylint: disable=too-many-arguments
         :type placeholder:  str
 
         """
-        if placeholder in commands_by_placeholder:
-            commands_by_placeholder[placeholder].append(cmd)
-        else:
-            commands_by_placeholder[placeholder] = [cmd]
+        commands_by_placeholder.setdefault(placeholder, []).append(cmd)
 
-    commands_display = ""
+    commands_display = []
     env_values = dict()
-    for cmd in commands:
-        try:
-            cmd_dict = command_impl_core.read_dict(cmd)
-        except FileNotFoundError:
-            commands_display += " " + Fore.RED + cmd + Fore.RESET
+    for cmd, cmd_dict in zip(commands, command_impl_core.read_dicts(commands)):
+        if cmd_dict is None:
+            commands_display.append(Fore.RED + cmd + Fore.RESET)
             continue
-        commands_display += " " + cmd
+        commands_display.append(cmd)
         cmd_dict["name"] = cmd
         command_dicts.append(cmd_dict)
         command_dicts_by_cmd[cmd] = cmd_dict
@@ -210,10 +267,17 @@ def init_print_info_collections(  # pylint: disable=too-many-arguments
             placeholders_sets["toggle"].add(key)
         if not ignore_env:
             virtual_tools.update_env(cmd_dict["cmdline"], env_values)
-    return commands_display[1:]
+    share_placeholder_groups(commands_by_placeholder)
+    return PrintInfo(
+        commands_display=" ".join(commands_display),
+        command_dicts=command_dicts,
+        command_dicts_by_cmd=command_dicts_by_cmd,
+        commands_by_placeholder=commands_by_placeholder,
+        placeholders_sets=placeholders_sets,
+    )
 
 
-def print_group_args(group, group_args, build_format_fun):
+def print_group_args(group, group_args, build_format_fun, out):
     """Print the placeholders used in a group of commands.
 
     For every "arg" (placeholder name) in ``group_args``, iterate through the
@@ -242,6 +306,8 @@ def print_group_args(group, group_args, build_format_fun):
                                  [str, str, str | None, str | None],
                                  tuple[bool, str, list[str | None]]
                              ]
+    :param out:              lines of output to print; to modify
+    :type out:               list[str]
 
     """
     first_cmd = group[0]
@@ -254,10 +320,10 @@ def print_group_args(group, group_args, build_format_fun):
                 )
                 if done:
                     break
-        print(format_str.format(*format_args))
+        out.append(format_str.format(*format_args))
 
 
-def print_command_groups(cmd_group_args, command_dicts_by_cmd):
+def print_command_groups(cmd_group_args, command_dicts_by_cmd, out):
     """Print the placeholders used in every group of commands.
 
     The bulk of this function is really in the definition of the formatter
@@ -274,6 +340,8 @@ def print_command_groups(cmd_group_args, command_dicts_by_cmd):
     :param command_dicts_by_cmd: dict of command dictionaries, keyed by
                                  command name
     :type command_dicts_by_cmd:  dict[str, dict[str, str]]
+    :param out:                  lines of output to print; to modify
+    :type out:                   list[str]
 
     """
     _, firstargs = cmd_group_args[0]
@@ -335,9 +403,9 @@ def print_command_groups(cmd_group_args, command_dicts_by_cmd):
             return True, "{}", [arg]
         # Prepare the format values to be added.
         if vals_per_arg == 1:
-            args_suffix = [shlex.quote(value), cmd]
+            args_suffix = [quote_value(value), cmd]
         else:
-            args_suffix = [shlex.quote(value[0]), shlex.quote(value[1]), cmd]
+            args_suffix = [quote_value(value[0]), quote_value(value[1]), cmd]
         # If this is first invocation for this arg, return initial info.
         if format_str is None:
             format_args = [arg] + args_suffix + [value]
@@ -359,13 +427,17 @@ def print_command_groups(cmd_group_args, command_dicts_by_cmd):
         return False, format_str, format_args
 
     for group, args in cmd_group_args:
-        print(Fore.CYAN + "* " + ", ".join(group) + Fore.RESET)
+        out.append(Fore.CYAN + "* " + ", ".join(group) + Fore.RESET)
         args.sort()
-        print_group_args(group, args, build_format)
+        print_group_args(group, args, build_format, out)
 
 
 def print_placeholders_set(
-    placeholders_set, sortfunc, command_dicts_by_cmd, commands_by_placeholder
+    placeholders_set,
+    sortfunc,
+    command_dicts_by_cmd,
+    commands_by_placeholder,
+    out,
 ):
     """Print info for all placeholders of a given type.
 
@@ -400,56 +472,30 @@ def print_placeholders_set(
                                     that placeholder appears, initially empty;
                                     to modify
     :type commands_by_placeholder:  dict[str, dict[str, str]]
+    :param out:                     lines of output to print; to modify
+    :type out:                      list[str]
 
     """
-
-    def args_updater(arg, oldargs, update_checker):
-        """Utility for doing compact element updates during comprehension.
-
-        Add ``arg`` to the ``oldargs`` list, and add ``True`` to the
-        ``update_checker`` list.
-
-        :param arg:            placeholder name to process
-        :type arg:             str
-        :param oldargs:        current list of placeholder names in element
-        :type oldargs:         str
-        :param update_checker: list used to track whether this function has
-                               been called during the comprehension
-        :type update_checker:  list[bool]
-
-        """
-        oldargs.append(arg)
-        update_checker.append(True)
-        return oldargs
-
-    cmd_group_args = []
+    # Group lists are shared between placeholders used by the same commands
+    # (see gather_print_info), so list identity is a cheap and
+    # sufficient key for finding the existing entry for a command group.
+    group_args_by_id = dict()
     for arg in placeholders_set:
         cmd_group = commands_by_placeholder[arg]
-        update_checker = []
-        # The syntax here is a bit much, but the gist is: if there's already
-        # an element in this list with the same command group, add this
-        # placeholder to the list of placeholders there, using the
-        # args_updater function. For all other elements that don't match the
-        # command group, leave them unchanged.
-        cmd_group_args = [
-            (group, args_updater(arg, group_args, update_checker))
-            if group == cmd_group
-            else (group, group_args)
-            for (group, group_args) in cmd_group_args
-        ]
-        # If args_updater was not called above, i.e. there was no element
-        # with a matching command group, then let's add one.
-        if not update_checker:
-            newentry = (cmd_group, [arg])
-            cmd_group_args.append(newentry)
+        group_id = id(cmd_group)
+        if group_id in group_args_by_id:
+            group_args_by_id[group_id][1].append(arg)
+        else:
+            group_args_by_id[group_id] = (cmd_group, [arg])
+    cmd_group_args = list(group_args_by_id.values())
     cmd_group_args.sort(key=sortfunc, reverse=True)
-    print_command_groups(cmd_group_args, command_dicts_by_cmd)
+    print_command_groups(cmd_group_args, command_dicts_by_cmd, out)
 
 
 def print_multi(commands, ignore_env):
     """Pretty-print the info for multiple commands.
 
-    Call :func:`init_print_info_collections` to build the info and
+    Call :func:`gather_print_info` to build the info and
     associations that will be used for pretty-printing. At the coarsest
     level, placeholders will be bucketed as "required values", "optional
     values", and "toggles".
@@ -463,6 +509,9 @@ def print_multi(commands, ignore_env):
     pretty-print a header and call :func:`print_placeholders_set` to print
     the info for those placeholders.
 
+    All of the output lines are collected in a list that is passed down to
+    the helper functions, and then printed all at once.
+
     :param commands:   names of commands to print
     :type commands:    list[str]
     :param ignore_env: whether to ignore the effects of chaintool-env; will
@@ -474,18 +523,11 @@ def print_multi(commands, ignore_env):
 
     """
     num_commands = len(commands)
-    command_dicts = []
-    command_dicts_by_cmd = dict()
-    commands_by_placeholder = dict()
-    placeholders_sets = {"required": set(), "optional": set(), "toggle": set()}
-    commands_display = init_print_info_collections(
-        commands,
-        command_dicts,
-        command_dicts_by_cmd,
-        commands_by_placeholder,
-        placeholders_sets,
-        ignore_env,
-    )
+    info = gather_print_info(commands, ignore_env)
+    # Position of each command's first appearance in the commands list.
+    first_positions = dict()
+    for pos, cmd in enumerate(commands):
+        first_positions.setdefault(cmd, pos)
 
     def cga_sort_keyvalue(cmd_group_args):
         """Sort function for command-groups-with-placeholders.
@@ -504,46 +546,47 @@ def print_multi(commands, ignore_env):
         """
         group = cmd_group_args[0]
         return num_commands * len(group) + (
-            num_commands - commands.index(group[0]) - 1
+            num_commands - first_positions[group[0]] - 1
         )
 
-    print(Fore.MAGENTA + "** commands:" + Fore.RESET)
-    print(commands_display)
-    print()
-    print(Fore.MAGENTA + "** commandline formats:" + Fore.RESET)
-    for cmd_dict in command_dicts:
-        print(Fore.CYAN + "* " + cmd_dict["name"] + Fore.RESET)
-        print(cmd_dict["cmdline"])
-    if placeholders_sets["required"]:
-        print()
-        print(Fore.MAGENTA + "** required values:" + Fore.RESET)
+    out = []
+    out.append(MULTI_COMMANDS_HEADER)
+    out.append(info.commands_display)
+    out.append("")
+    out.append(MULTI_CMDLINE_HEADER)
+    for cmd_dict in info.command_dicts:
+        out.append(Fore.CYAN + "* " + cmd_dict["name"] + Fore.RESET)
+        out.append(cmd_dict["cmdline"])
+    if info.placeholders_sets["required"]:
+        out.append("")
+        out.append(MULTI_REQUIRED_HEADER)
         print_placeholders_set(
-            placeholders_sets["required"],
+            info.placeholders_sets["required"],
             cga_sort_keyvalue,
-            command_dicts_by_cmd,
-            commands_by_placeholder,
+            info.command_dicts_by_cmd,
+            info.commands_by_placeholder,
+            out,
         )
-    if placeholders_sets["optional"]:
-        print()
-        print(Fore.MAGENTA + "** optional values with default:" + Fore.RESET)
+    if info.placeholders_sets["optional"]:
+        out.append("")
+        out.append(MULTI_OPTIONAL_HEADER)
         print_placeholders_set(
-            placeholders_sets["optional"],
+            info.placeholders_sets["optional"],
             cga_sort_keyvalue,
-            command_dicts_by_cmd,
-            commands_by_placeholder,
-        )
-    if placeholders_sets["toggle"]:
-        print()
-        print(
-            Fore.MAGENTA
-            + "** toggles with untoggled:toggled values:"
-            + Fore.RESET
+            info.command_dicts_by_cmd,
+            info.commands_by_placeholder,
+            out,
         )
+    if info.placeholders_sets["toggle"]:
+        out.append("")
+        out.append(MULTI_TOGGLE_HEADER)
         print_placeholders_set(
-            placeholders_sets["toggle"],
+            info.placeholders_sets["toggle"],
             cga_sort_keyvalue,
-            command_dicts_by_cmd,
-            commands_by_placeholder,
+            info.command_dicts_by_cmd,
+            info.commands_by_placeholder,
+            out,
         )
-    print()
+    out.append("")
+    print("\n".join(out))
     return 0
@@ -86,6 +86,48 @@ SOURCESCRIPT_LOCATION = os.path.join(
 USERDIR_LOCATION = os.path.join(LOCATIONS_DIR, "completions_lazy_load_userdir")
 
 
+def read_script_resource(name):
+    """Read the text of a completion script bundled with the package.
+
+    Use :func:`importlib.resources.files` where available (Python 3.9+),
+    falling back to the older :func:`importlib.resources.read_text` API
+    (which is deprecated in some newer Python versions).
+
+    :param name: resource name
+    :type name:  str
+
+    :returns: the script text
+    :rtype:   str
+
+    """
+    if hasattr(importlib.resources, "files"):
+        resource = importlib.resources.files(__package__).joinpath(name)
+        return resource.read_text()
+    return importlib.resources.read_text(__package__, name)
+
+
+def write_if_changed(path, text):
+    """Write a file, unless it already has exactly the given contents.
+
+    Leaving an up-to-date file alone avoids needless writes and keeps its
+    modification time stable for anything watching it.
+
+    :param path: path of file to write
+    :type path:  str
+    :param text: desired file contents
+    :type text:  str
+
+    """
+    try:
+        with open(path, "r") as instream:
+            if instream.read() == text:
+                return
+    except FileNotFoundError:
+        pass
+    with open(path, "w") as outstream:
+        outstream.write(text)
+
+
 def init(prev_version, cur_version):
     """Initialize module.
 
@@ -97,7 +139,8 @@ def init(prev_version, cur_version):
     files can be extracted from the package resources and placed in the
     completions directory. The "omnibus" file is also created there. These
     three files will be (re)created if missing or if the chaintool version
-    has changed since last run.
+    has changed since last run; a file whose contents would be unchanged is
+    not rewritten.
 
     :param prev_version: version string of previous chaintool run
     :type prev_version:  str
@@ -109,34 +152,24 @@ def init(prev_version, cur_version):
     os.makedirs(SHORTCUTS_COMPLETIONS_DIR, exist_ok=True)
     version_change = prev_version != cur_version
     if version_change or not os.path.exists(MAIN_SCRIPT_PATH):
-        script = importlib.resources.read_text(
-            __package__, "chaintool_completion"
-        )
+        script = read_script_resource("chaintool_completion")
         script = script.replace("###MY_PYTHON###", sys.executable)
-        with open(MAIN_SCRIPT_PATH, "w") as outstream:
-            outstream.write(script)
+        write_if_changed(MAIN_SCRIPT_PATH, script)
     if version_change or not os.path.exists(HELPER_SCRIPT_PATH):
-        script = importlib.resources.read_text(
-            __package__, "chaintool_run_op_common_completion"
-        )
-        with open(HELPER_SCRIPT_PATH, "w") as outstream:
-            outstream.write(script)
+        script = read_script_resource("chaintool_run_op_common_completion")
+        write_if_changed(HELPER_SCRIPT_PATH, script)
     if version_change or not os.path.exists(OMNIBUS_SCRIPT_PATH):
-        with open(OMNIBUS_SCRIPT_PATH, "w") as outstream:
-            outstream.write(
-                "source {}\n".format(shlex.quote(MAIN_SCRIPT_PATH))
-            )
-            outstream.write(
-                "source {}\n".format(shlex.quote(HELPER_SCRIPT_PATH))
+        script = (
+            "source {}\n".format(shlex.quote(MAIN_SCRIPT_PATH))
+            + "source {}\n".format(shlex.quote(HELPER_SCRIPT_PATH))
+            + "ls {0}/* >/dev/null 2>&1 && for s in {0}/*\n".format(
+                shlex.quote(SHORTCUTS_COMPLETIONS_DIR)
             )
-            outstream.write(
-                "ls {0}/* >/dev/null 2>&1 && for s in {0}/*\n".format(
-                    shlex.quote(SHORTCUTS_COMPLETIONS_DIR)
-                )
-            )
-            outstream.write("do\n")
-            outstream.write('  source "$s"\n')
-            outstream.write("done\n")
+            + "do\n"
+            + '  source "$s"\n'
+            + "done\n"
+        )
+        write_if_changed(OMNIBUS_SCRIPT_PATH, script)
 
 
 def write_complete_invoke(outstream, item_name):
@@ -40,7 +40,6 @@ __all__ = [
 
 
 import atexit
-import copy
 import os
 import tempfile
 
@@ -386,7 +385,7 @@ def cli_run(seq, quiet, args, ignore_errors, skip_cmdnames):
     cmd_list = seq_dict["commands"]
     locks.multi_item_lock("cmd", cmd_list, locks.LockType.READ)
     locks.release_inventory_lock("cmd", locks.LockType.READ)
-    unused_args = copy.deepcopy(args)
+    unused_args = dict.fromkeys(args)
     rsv_ctx = command_impl_op.ReservedPlaceholdersCtx()
     req_stdout = req_stdout_flags(cmd_list)
     with tempfile.TemporaryDirectory() as tmpdirname:
@@ -464,7 +463,7 @@ def cli_vals(seq, args, print_after_set):
     locks.multi_item_lock("cmd", cmd_list, locks.LockType.WRITE)
     locks.release_inventory_lock("cmd", locks.LockType.READ)
     print()
-    unused_args = copy.deepcopy(args)
+    unused_args = dict.fromkeys(args)
     print(Fore.MAGENTA + "* updating all commands in sequence" + Fore.RESET)
     print()
     error = False
@@ -23,9 +23,11 @@
 __all__ = [
     "SEQ_DIR",
     "init",
+    "seq_path",
     "exists",
     "all_names",
     "read_dict",
+    "read_dicts",
     "write_dict",
     "create_temp",
 ]
@@ -35,10 +37,12 @@ import os
 
 import yaml  # from pyyaml
 
+from . import shared
 from .shared import DATA_DIR
 
 
 SEQ_DIR = os.path.join(DATA_DIR, "sequences")
+SEQ_DIR_PREFIX = SEQ_DIR + os.sep
 
 
 def init(_prev_version, _cur_version):
@@ -56,6 +60,23 @@ def init(_prev_version, _cur_version):
     os.makedirs(SEQ_DIR, exist_ok=True)
 
 
+def seq_path(seq):
+    """Get the path of the file for the given sequence.
+
+    This is a plain concatenation onto :const:`SEQ_DIR` rather than an
+    :func:`os.path.join`; the result is the same except that a name that
+    looks like an absolute path still stays inside the sequences directory.
+
+    :param seq: name of sequence
+    :type seq:  str
+
+    :returns: path of the sequence file in the sequences directory
+    :rtype:   str
+
+    """
+    return SEQ_DIR_PREFIX + seq
+
+
 def exists(seq):
     """Test whether the given sequence already exists.
 
@@ -68,7 +89,7 @@ def exists(seq):
     :rtype:   bool
 
     """
-    return os.path.exists(os.path.join(SEQ_DIR, seq))
+    return os.path.exists(seq_path(seq))
 
 
 def all_names():
@@ -98,16 +119,36 @@ def read_dict(seq):
     :rtype:   dict[str, str]
 
     """
-    with open(os.path.join(SEQ_DIR, seq), "r") as seq_file:
-        seq_dict = yaml.safe_load(seq_file)
+    with open(seq_path(seq), "rb") as seq_file:
+        seq_dict = yaml.load(seq_file.read(), Loader=shared.YamlLoader)
     return seq_dict
 
 
+def read_dicts(seqs):
+    """Fetch the contents of multiple sequences as dictionaries.
+
+    Batch wrapper around :func:`read_dict`; see :func:`.shared.read_dicts`.
+
+    :param seqs: names of sequences to read
+    :type seqs:  list[str]
+
+    :returns: dictionaries of sequence properties/values, with ``None`` in
+              place of any sequence that does not exist
+    :rtype:   list[dict[str, str] | None]
+
+    """
+    return shared.read_dicts(seqs, read_dict)
+
+
 def write_dict(seq, seq_dict, mode):
     """Write the contents of a sequence as a dictionary.
 
-    Dump the sequence dictionary into a YAML document and write it into the
-    sequences directory.
+    Dump the sequence dictionary into a (UTF-8 encoded) YAML document and
+    write it into the sequences directory.
+
+    The document is written via :func:`.shared.write_data_file`, so anything
+    reading the sequence file sees either the old contents or the new, never
+    a partial write.
 
     :param seq:      name of sequence to write
     :type seq:       str
@@ -119,9 +160,17 @@ def write_dict(seq, seq_dict, mode):
     :raises: FileExistsError if mode is "x" and the sequence exists
 
     """
-    seq_doc = yaml.dump(seq_dict, default_flow_style=False)
-    with open(os.path.join(SEQ_DIR, seq), mode) as seq_file:
-        seq_file.write(seq_doc)
+    shared.write_data_file(
+        seq_path(seq),
+        mode,
+        lambda outstream: yaml.dump(
+            seq_dict,
+            outstream,
+            Dumper=shared.YamlDumper,
+            default_flow_style=False,
+            encoding="utf-8",
+        ),
+    )
 
 
 def create_temp(seq):
@@ -26,6 +26,8 @@ __all__ = [
     "DATA_DIR",
     "LOCATIONS_DIR",
     "MSG_WARN_PREFIX",
+    "YamlLoader",
+    "YamlDumper",
     "init",
     "get_last_schema_version",
     "set_last_schema_version",
@@ -38,6 +40,8 @@ __all__ = [
     "editline",
     "check_shell",
     "delete_if_exists",
+    "read_dicts",
+    "write_data_file",
     "read_choicefile",
     "write_choicefile",
     "get_startup_script_path",
@@ -50,11 +54,20 @@ import readline
 import shutil
 import sys
 import string
+import uuid
+
+from concurrent.futures import ThreadPoolExecutor
 
 import appdirs
 
 from colorama import Fore
 
+# Use the libyaml-backed loader/dumper when pyyaml was built with it.
+try:
+    from yaml import CSafeLoader as YamlLoader, CSafeDumper as YamlDumper
+except ImportError:
+    from yaml import SafeLoader as YamlLoader, SafeDumper as YamlDumper
+
 
 APP_NAME = "chaintool"
 APP_AUTHOR = "Joel Baxter"
@@ -68,6 +81,11 @@ PYTHON_VER_MARKER_PATH = os.path.join(CONFIG_DIR, "last_python_version")
 
 MSG_WARN_PREFIX = Fore.YELLOW + "Warning:" + Fore.RESET
 
+# Batches at or below READ_DICTS_SERIAL_MAX items are read without a thread
+# pool; otherwise the pool size is capped at READ_DICTS_MAX_WORKERS.
+READ_DICTS_SERIAL_MAX = 4
+READ_DICTS_MAX_WORKERS = 16
+
 
 def init():
     """Initialize module.
@@ -358,6 +376,112 @@ def delete_if_exists(filepath):
         pass
 
 
+def read_dicts(names, read_fun):
+    """Fetch the contents of multiple commands or sequences as dictionaries.
+
+    Use a thread pool to run ``read_fun`` for all of the named items, so
+    that the file reads can overlap rather than waiting on each file in
+    turn. For only a few items the cost of spinning up the pool isn't worth
+    it, so just read them in sequence. Return the results in the same order
+    as ``names``.
+
+    :param names:    names of commands or sequences to read
+    :type names:     list[str]
+    :param read_fun: function to read a single item's dictionary, raising
+                     FileNotFoundError if the item does not exist
+    :type read_fun:  Callable[[str], dict[str, str]]
+
+    :returns: dictionaries of item properties/values, with ``None`` in place
+              of any item that does not exist
+    :rtype:   list[dict[str, str] | None]
+
+    """
+
+    def read_if_exists(name):
+        try:
+            return read_fun(name)
+        except FileNotFoundError:
+            return None
+
+    if len(names) <= READ_DICTS_SERIAL_MAX:
+        return [read_if_exists(name) for name in names]
+    max_workers = min(READ_DICTS_MAX_WORKERS, len(names))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(read_if_exists, names))
+
+
+def copy_to_new_file(src_path, dst_path):
+    """Copy a file's contents to a new file.
+
+    Used by :func:`write_data_file` where hard links aren't available.
+
+    :param src_path: file to copy from
+    :type src_path:  str
+    :param dst_path: file to create; if the copy fails, it is deleted
+    :type dst_path:  str
+
+    :raises: FileExistsError if the destination file exists
+
+    """
+    with open(src_path, "rb") as src_file:
+        with open(dst_path, "xb") as dst_file:
+            try:
+                shutil.copyfileobj(src_file, dst_file)
+            except BaseException:
+                dst_file.close()
+                os.remove(dst_path)
+                raise
+
+
+def write_data_file(filepath, mode, write_fun):
+    """Write a file so that readers never see it partially written.
+
+    Call ``write_fun`` with a temporary file, opened for binary writing, to
+    write the complete contents. The temporary file is in the data appdir
+    (not in any of the item directories under it, so it never shows up as a
+    command or sequence). Then put it in place. For mode "w" the temporary
+    file is moved over ``filepath`` with :func:`os.replace`. (So if
+    ``filepath`` is a symlink, the link itself is replaced by a regular
+    file.) For mode "x" it is hard-linked to ``filepath`` with
+    :func:`os.link`, which atomically fails if that path already exists, and
+    then the temporary name is removed. If anything goes wrong, the
+    temporary file is deleted and ``filepath`` is left untouched.
+
+    Some filesystems (e.g. FAT, or some network mounts) don't support hard
+    links. In that case mode "x" falls back to creating ``filepath`` with an
+    exclusive open and copying the temporary file's contents into it, which
+    isn't atomic; if the copy fails, the partial ``filepath`` is deleted.
+
+    :param filepath:  file to write; must be somewhere in the data appdir
+    :type filepath:   str
+    :param mode:      "w" to create or replace the file, or "x" to create it
+                      only if it doesn't exist
+    :type mode:       "w" | "x"
+    :param write_fun: function to write the contents into a given file
+    :type write_fun:  Callable[[BinaryIO], None]
+
+    :raises: FileExistsError if mode is "x" and the file exists
+
+    """
+    temp_path = os.path.join(DATA_DIR, ".{}.tmp".format(uuid.uuid4().hex))
+    try:
+        with open(temp_path, "xb") as temp_file:
+            write_fun(temp_file)
+        if mode == "x":
+            try:
+                os.link(temp_path, filepath)
+            except FileExistsError:
+                raise
+            except OSError:
+                copy_to_new_file(temp_path, filepath)
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, filepath)
+    except BaseException:
+        delete_if_exists(temp_path)
+        raise
+
+
 def read_choicefile(choicefile_path):
     """Return the file contents (choice string), if the file exists.
 
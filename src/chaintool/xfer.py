@@ -55,9 +55,9 @@ def cli_export(export_file):
     command names, and readlock all those items.
 
     Open the given file and write a YAML doc to it. Commands (from
-    :func:`.command_impl_core.read_dict`) are written to a list value for the
-    "commands" property, and sequences (from
-    :func:`.sequence_impl_core.read_dict`) similarly to the "sequences"
+    :func:`.command_impl_core.read_dicts`) are written to a list value for
+    the "commands" property, and sequences (from
+    :func:`.sequence_impl_core.read_dicts`) similarly to the "sequences"
     property. The "schema_version" is also written, to help interpret this
     file if its format changes in the future.
 
@@ -91,10 +91,10 @@ def cli_export(export_file):
     }
     print(Fore.MAGENTA + "* Exporting commands..." + Fore.RESET)
     print()
-    for cmd in command_names:
-        try:
-            cmd_dict = command_impl_core.read_dict(cmd)
-        except FileNotFoundError:
+    for cmd, cmd_dict in zip(
+        command_names, command_impl_core.read_dicts(command_names)
+    ):
+        if cmd_dict is None:
             print("Failed to read command '{}' ... skipped.".format(cmd))
             print()
             continue
@@ -105,10 +105,10 @@ def cli_export(export_file):
         print()
     print(Fore.MAGENTA + "* Exporting sequences..." + Fore.RESET)
     print()
-    for seq in sequence_names:
-        try:
-            seq_dict = sequence_impl_core.read_dict(seq)
-        except FileNotFoundError:
+    for seq, seq_dict in zip(
+        sequence_names, sequence_impl_core.read_dicts(sequence_names)
+    ):
+        if seq_dict is None:
             print("Failed to read sequence '{}' ... skipped.".format(seq))
             print()
             continue
@@ -117,7 +117,9 @@ def cli_export(export_file):
         )
         print("Sequence '{}' exported.".format(seq))
         print()
-    export_doc = yaml.dump(export_dict, default_flow_style=False)
+    export_doc = yaml.dump(
+        export_dict, Dumper=shared.YamlDumper, default_flow_style=False
+    )
     with open(export_file, "w") as outfile:
         outfile.write(export_doc)
     return 0
@@ -163,10 +165,10 @@ def cli_import(import_file, overwrite):
     print()
     if import_file.startswith("https://") or import_file.startswith("http://"):
         with requests.get(import_file) as response:
-            import_dict = yaml.safe_load(response.text)
+            import_dict = yaml.load(response.text, Loader=shared.YamlLoader)
     else:
         with open(import_file, "r") as infile:
-            import_dict = yaml.safe_load(infile)
+            import_dict = yaml.load(infile.read(), Loader=shared.YamlLoader)
     print(Fore.MAGENTA + "* Importing commands..." + Fore.RESET)
     print()
     for cmd_dict in import_dict["commands"]:
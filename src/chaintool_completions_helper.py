@@ -24,57 +24,102 @@
 __all__ = ["main"]
 
 
+import hashlib
+import os
 import sys
+import time
+import uuid
 
 from chaintool import command_impl_core
 from chaintool import sequence_impl_core
-from chaintool import virtual_tools
-
-
-def update_placeholders_collections(
-    key, value, consistent_values_dict, other_set
-):
-    """Memo-ize whether a placeholder has a single value in a set of commands.
-
-    This function is called repeatedly by :func:`dump_placeholders` to build
-    a picture of which placeholders are set to only one specific value in a
-    set of commands; such placeholder names and values will be populated in
-    ``consistent_values_dict``. If a placeholder is not set to any value, or
-    if it appears multiple times and is set to different values, it will be
-    treated differently; such placeholder names will be populated in
-    ``other_set``.
-
-    So: examine the ``key`` and ``value`` for a placeholder to process,
-    examine the existing items in``consistent_values_dict`` and ``other_set``,
-    and update the dict and/or set accordingly.
-
-    :param key:                    the name of the placeholder to process
-    :type key:                     str
-    :param value:                  the value for the placeholder to process
-    :type value:                   str
-    :param consistent_values_dict: dict of placeholders that have a consistent
-                                   value (value keyed by placeholder name);
-                                   to modify
-    :type consistent_values_dict:  dict[str, str | [str, str]]
-    :param other_set:              set of names of placeholders that have
-                                   either no value or multiple values; to
-                                   modify
-    :type other_set:               set[str]
+from chaintool import shared
+
+
+# Tab-completion can invoke this script several times in quick succession
+# with the same args, so the output of dump_placeholders is kept on disk for
+# a short while and reused.
+DUMP_CACHE_DIR = os.path.join(shared.CACHE_DIR, "dump_placeholders")
+DUMP_CACHE_TTL = 2.0
+
+
+def dump_cache_path(commands, is_run):
+    """Get the path of the cached dump_placeholders output for these args.
+
+    The cache filename is a hash of the args along with the modification time
+    and size of each command's file (or ``None`` for a missing command), so
+    any change to a command leads to a different cache file.
+
+    :param commands: names of commands to process
+    :type commands:  list[str]
+    :param is_run:   whether this is for an intended "run" op
+    :type is_run:    bool
+
+    :returns: path of the cache file
+    :rtype:   str
 
     """
-    if key in other_set:
-        return
-    if value is None:
-        if key in consistent_values_dict:
-            del consistent_values_dict[key]
-        other_set.add(key)
-        return
-    if key not in consistent_values_dict:
-        consistent_values_dict[key] = value
-        return
-    if consistent_values_dict[key] != value:
-        del consistent_values_dict[key]
-        other_set.add(key)
+    cache_key = [is_run]
+    for cmd in commands:
+        try:
+            cmd_stat = os.stat(command_impl_core.cmd_path(cmd))
+            cache_key.append((cmd, cmd_stat.st_mtime_ns, cmd_stat.st_size))
+        except OSError:
+            cache_key.append((cmd, None))
+    digest = hashlib.blake2b(
+        repr(cache_key).encode("utf-8"), digest_size=16
+    ).hexdigest()
+    return os.path.join(DUMP_CACHE_DIR, digest)
+
+
+def read_dump_cache(cache_path):
+    """Get cached dump_placeholders output, if it exists and is recent.
+
+    :param cache_path: path of the cache file
+    :type cache_path:  str
+
+    :returns: the cached output, or ``None`` if not available
+    :rtype:   str | None
+
+    """
+    try:
+        with open(cache_path, "r") as cache_file:
+            age = time.time() - os.fstat(cache_file.fileno()).st_mtime
+            if age >= DUMP_CACHE_TTL:
+                return None
+            return cache_file.read()
+    except OSError:
+        return None
+
+
+def write_dump_cache(cache_path, output):
+    """Store dump_placeholders output in the cache, and prune old entries.
+
+    The cache is only an optimization, so any failure here is ignored.
+
+    :param cache_path: path of the cache file
+    :type cache_path:  str
+    :param output:     output to cache
+    :type output:      str
+
+    """
+    temp_path = os.path.join(
+        DUMP_CACHE_DIR, ".{}.tmp".format(uuid.uuid4().hex)
+    )
+    try:
+        os.makedirs(DUMP_CACHE_DIR, exist_ok=True)
+        with open(temp_path, "x") as temp_file:
+            temp_file.write(output)
+        os.replace(temp_path, cache_path)
+        now = time.time()
+        with os.scandir(DUMP_CACHE_DIR) as entries:
+            for entry in entries:
+                if now - entry.stat().st_mtime >= DUMP_CACHE_TTL:
+                    os.remove(entry.path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
 
 
 def dump_placeholders(commands, is_run):  # pylint: disable=too-many-branches
@@ -82,12 +127,21 @@ def dump_placeholders(commands, is_run):  # pylint: disable=too-many-branches
 
     Used internally for bash autocompletion purposes.
 
-    Iterate through the ``commands``. Run their placeholders and toggle-type
-    placeholders through :func:`update_placeholders_collections` to build
-    placeholder info for printing.
-
-    Then iterate through the collections and print the placeholder info in a
-    form useful for doing a command-line autocompletion given the first few
+    If the same args were dumped within the last :const:`DUMP_CACHE_TTL`
+    seconds and none of the commands has changed since, just print the
+    cached output from that time.
+
+    Otherwise, read the dictionaries for all of the ``commands``,
+    concurrently. Use
+    their placeholders and toggle-type placeholders to build a picture of
+    which placeholders are set to only one specific value in this set of
+    commands; such placeholder names and values go in the "consistent value"
+    dicts. If a placeholder is not set to any value, or if it appears
+    multiple times and is set to different values, it goes in the "other"
+    sets instead.
+
+    Then iterate through the collections and generate the placeholder info in
+    a form useful for doing a command-line autocompletion given the first few
     characters of the placeholder name.
 
     - If a placeholder has a consistent value, we want to include the value
@@ -98,6 +152,8 @@ def dump_placeholders(commands, is_run):  # pylint: disable=too-many-branches
     - If a toggle has an inconsistent value, still print an "=" character if
       ``is_run`` is false, since some value must be provided in that case.
 
+    Print that info and also store it in the cache.
+
     :param commands: names of commands to process
     :type commands:  list[str]
     :param is_run:   whether this is for an intended "run" op (as opposed to
@@ -108,52 +164,70 @@ def dump_placeholders(commands, is_run):  # pylint: disable=too-many-branches
     :rtype:   int
 
     """
+    cache_path = dump_cache_path(commands, is_run)
+    output = read_dump_cache(cache_path)
+    if output is not None:
+        sys.stdout.write(output)
+        return 0
+    if is_run:
+        # Only needed for chaintool-env handling in "run" dumps, so don't
+        # load it otherwise (or on a cache hit).
+        # pylint: disable=import-outside-toplevel
+        from chaintool import virtual_tools
     placeholders_with_consistent_value = dict()
     other_placeholders_set = set()
     toggles_with_consistent_value = dict()
     other_toggles_set = set()
     env_values = dict()
-    for cmd in commands:
-        try:
-            cmd_dict = command_impl_core.read_dict(cmd)
-        except FileNotFoundError:
+    for cmd_dict in command_impl_core.read_dicts(commands):
+        if cmd_dict is None:
             continue
         for key, value in cmd_dict["args"].items():
+            if key in other_placeholders_set:
+                continue
             if key in env_values:
                 # Treat this as unset because this value cannot be entered
                 # on the commandline to the same effect... it will not be
                 # interpreted for placeholder substitution as a run arg.
                 value = None
-                cmd_dict["args"][key] = value
-            update_placeholders_collections(
-                key,
-                value,
-                placeholders_with_consistent_value,
-                other_placeholders_set,
-            )
+            if value is None:
+                placeholders_with_consistent_value.pop(key, None)
+                other_placeholders_set.add(key)
+            elif (
+                placeholders_with_consistent_value.setdefault(key, value)
+                != value
+            ):
+                del placeholders_with_consistent_value[key]
+                other_placeholders_set.add(key)
         for key, value in cmd_dict["toggle_args"].items():
-            update_placeholders_collections(
-                key,
-                value,
-                toggles_with_consistent_value,
-                other_toggles_set,
-            )
+            if key in other_toggles_set:
+                continue
+            if value is None:
+                toggles_with_consistent_value.pop(key, None)
+                other_toggles_set.add(key)
+            elif toggles_with_consistent_value.setdefault(key, value) != value:
+                del toggles_with_consistent_value[key]
+                other_toggles_set.add(key)
         if is_run:
             virtual_tools.update_env(cmd_dict["cmdline"], env_values)
+    out = []
     for key, value in placeholders_with_consistent_value.items():
-        print("{}={}".format(key, value))
+        out.append("{}={}\n".format(key, value))
     for key in other_placeholders_set:
-        print("{}".format(key))
+        out.append("{}\n".format(key))
     if is_run:
         for key in toggles_with_consistent_value:
-            print(key)
+            out.append(key + "\n")
         for key in other_toggles_set:
-            print(key)
+            out.append(key + "\n")
     else:
         for key, value in toggles_with_consistent_value.items():
-            print("{}={}:{}".format(key, value[0], value[1]))
+            out.append("{}={}:{}\n".format(key, value[0], value[1]))
         for key in other_toggles_set:
-            print("{}=".format(key))
+            out.append("{}=\n".format(key))
+    output = "".join(out)
+    write_dump_cache(cache_path, output)
+    sys.stdout.write(output)
     return 0
 
 